@@ -0,0 +1,93 @@
+"""
+Compare registry size and read latency across compression formats.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_compression.py
+"""
+
+import base64
+import json
+import os
+import random
+import string
+import tempfile
+import timeit
+
+from custom_secrets_manager.encryption_helper import (
+    COMPRESSION_CHOICES,
+    decrypt_data,
+    encrypt_secrets,
+    generate_key,
+)
+from custom_secrets_manager.secrets_loader import split_registry_lines
+
+_READ_REPEAT = 20
+
+
+def _random_text(length):
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def small_values_profile(count=2000):
+    return {f"API_KEY_{index}": _random_text(32) for index in range(count)}
+
+
+def json_blob_profile(count=200):
+    return {
+        f"service_{index}": json.dumps(
+            {
+                "host": f"db-{index % 5}.internal.example.com",
+                "port": 5432,
+                "username": "service_user",
+                "options": {"sslmode": "require", "pool_size": 10, "timeout": 30},
+                "replicas": [f"replica-{i}.internal.example.com" for i in range(5)],
+            }
+        )
+        for index in range(count)
+    }
+
+
+def pem_profile(count=50, size=4096):
+    return {
+        f"certificate_{index}": "-----BEGIN CERTIFICATE-----"
+        + base64.b64encode(os.urandom(size)).decode()
+        + "-----END CERTIFICATE-----"
+        for index in range(count)
+    }
+
+
+PROFILES = {
+    "small values": small_values_profile,
+    "json blobs": json_blob_profile,
+    "pem certificates": pem_profile,
+}
+
+
+def run_benchmark():
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        key_file = os.path.join(temp_dir, "encryption_key.txt")
+        with open(key_file, "wb") as f:
+            f.write(generate_key())
+        with open(key_file, "rb") as f:
+            key = f.read()
+
+        print(f"{'profile':<18}{'compression':<13}{'size (KiB)':>12}{'read (ms)':>12}")
+        for profile_name, build_profile in PROFILES.items():
+            registry = build_profile()
+            for compression in COMPRESSION_CHOICES:
+                encrypted = encrypt_secrets(registry, key_file, compression)
+                read_time = timeit.timeit(
+                    lambda: split_registry_lines(decrypt_data(encrypted, key)),
+                    number=_READ_REPEAT,
+                )
+                print(
+                    f"{profile_name:<18}{compression:<13}"
+                    f"{len(encrypted) / 1024:>12.1f}"
+                    f"{read_time / _READ_REPEAT * 1000:>12.2f}"
+                )
+
+
+if __name__ == "__main__":
+    run_benchmark()
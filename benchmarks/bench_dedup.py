@@ -0,0 +1,99 @@
+"""
+Compare registry size and loaded memory with and without value deduplication.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_dedup.py
+"""
+
+import gc
+import os
+import random
+import tempfile
+import tracemalloc
+import warnings
+
+from custom_secrets_manager.encryption_helper import (
+    encrypt_secrets,
+    generate_key,
+    serialize_registry,
+)
+from custom_secrets_manager.secrets_loader import (
+    parse_content,
+    split_registry_lines,
+    use_secrets,
+)
+
+
+def shared_config_profile(service_count=500):
+    hosts = [f"db-{index}.internal.example.com" for index in range(5)]
+    shared_credentials = {"username": "service_user", "password": "s3cr3t" * 8}
+    registry = {}
+    for index in range(service_count):
+        registry[f"service_{index}_database"] = {
+            "host": random.choice(hosts),
+            "port": 5432,
+            "options": {"sslmode": "require", "pool_size": 10},
+        }
+        registry[f"service_{index}_credentials"] = shared_credentials
+        registry[f"service_{index}_cache_host"] = random.choice(hosts)
+    return registry
+
+
+def measure_memory(load):
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+    return current
+
+
+def run_benchmark():
+    # parse_content tries literal_eval on hostnames, which warns on Python 3.8+
+    warnings.simplefilter("ignore", SyntaxWarning)
+    random.seed(0)
+    registry = shared_config_profile()
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        key_file = os.path.join(temp_dir, "encryption_key.txt")
+        with open(key_file, "wb") as f:
+            f.write(generate_key())
+        with open(key_file, "rb") as f:
+            key = f.read()
+
+        print(
+            f"{'dedup':<8}{'plain (KiB)':>13}{'encrypted (KiB)':>17}{'zlib (KiB)':>12}"
+        )
+        for dedup in (False, True):
+            plain = serialize_registry(registry, dedup)
+            encrypted = encrypt_secrets(registry, key_file, dedup=dedup)
+            compressed = encrypt_secrets(registry, key_file, "zlib", dedup)
+            print(
+                f"{str(dedup):<8}{len(plain) / 1024:>13.1f}"
+                f"{len(encrypted) / 1024:>17.1f}{len(compressed) / 1024:>12.1f}"
+            )
+
+        os.chdir(temp_dir)
+        try:
+            with open("secrets_registry.log", "wb") as f:
+                f.write(encrypt_secrets(registry, key_file, dedup=True))
+            raw_registry = split_registry_lines(serialize_registry(registry))
+            per_key_parse = measure_memory(
+                lambda: {
+                    key: parse_content(value) for key, value in raw_registry.items()
+                }
+            )
+            shared_parse = measure_memory(lambda: use_secrets(key))
+        finally:
+            os.chdir(original_dir)
+
+    print()
+    print(f"{'read path':<24}{'memory (KiB)':>14}")
+    print(f"{'parse every key':<24}{per_key_parse / 1024:>14.1f}")
+    print(f"{'use_secrets (shared)':<24}{shared_parse / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
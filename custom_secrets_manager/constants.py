@@ -1,4 +1,10 @@
 _PLAUSIBLE_FILE_EXT = [".yaml", ".json", ".ini"]
 _PLAUSIBLE_KEY_NAMES = ["secrets", "keys"]
+_DEDUP_VALUES_HEADER = "#value-table"
 logger_filename = "load_config_process.log"
 secrets_registry_filename = "secrets_registry.log"
+profile_filename = "load_config_process.prof"
+memory_report_filename = "load_config_process_memory.log"
+secrets_registry_shard_entry = "secrets_registry.shard-*.log"
+secrets_registry_lock_entry = "secrets_registry.log.lock"
+match_config_filename = ".csm_match.json"
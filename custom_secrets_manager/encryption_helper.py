@@ -1,4 +1,15 @@
+import lzma
+import zlib
+
 from cryptography.fernet import Fernet
+from custom_secrets_manager.constants import _DEDUP_VALUES_HEADER
+
+_PAYLOAD_MAGIC = b"CSM1:"
+_COMPRESSORS = {
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+COMPRESSION_CHOICES = ["none"] + sorted(_COMPRESSORS)
 
 
 # Generate encryption key
@@ -15,26 +26,105 @@ def encrypt_data(data, key):
 # Decrypt data using the encryption key
 def decrypt_data(encrypted_data, key):
     f = Fernet(key)
-    return f.decrypt(encrypted_data).decode()
+    return unpack_payload(f.decrypt(encrypted_data))
+
+
+def pack_payload(text, compression=None):
+    """
+    Encode text for encryption, optionally compressing it behind a format header.
+
+    Args:
+        text (str): Serialized registry content.
+        compression (str): "zlib", "lzma", or None/"none" for no compression.
+
+    Returns:
+        bytes: Payload to be encrypted.
+    """
+    data = text.encode()
+    if compression in (None, "none"):
+        return data
+    compress = _COMPRESSORS[compression][0]
+    return _PAYLOAD_MAGIC + compression.encode() + b"\n" + compress(data)
+
+
+def unpack_payload(payload):
+    """
+    Decode a decrypted payload, decompressing it if it has a format header.
+
+    Args:
+        payload (bytes): Decrypted payload.
+
+    Returns:
+        str: Serialized registry content.
+    """
+    if payload.startswith(_PAYLOAD_MAGIC):
+        header, _, body = payload.partition(b"\n")
+        compression = header[len(_PAYLOAD_MAGIC) :].decode()
+        if compression in _COMPRESSORS:
+            return _COMPRESSORS[compression][1](body).decode()
+    return payload.decode()
+
+
+def load_encryption_key(key_file):
+    """
+    Read the encryption key from the key file.
+
+    Args:
+        key_file (str): Path to the encryption key file.
+
+    Returns:
+        bytes: Encryption key.
+    """
+    with open(key_file, "rb") as f:
+        return f.read()
+
+
+def serialize_registry(secrets_registry, dedup=False):
+    """
+    Serialize a secrets registry to the "key: value" line format.
 
+    With dedup, each distinct value is written once to a value table headed by
+    a "#value-table <count>" line, and keys refer to values by table index. The
+    header has no ": ", so no "key: value" line can be mistaken for it.
 
-def encrypt_secrets(secrets_registry, key_file):
+    Args:
+        secrets_registry (dict): Dictionary containing the secrets registry.
+        dedup (bool): Store identical values once. (Default False)
+
+    Returns:
+        str: Serialized registry.
+    """
+    if not dedup:
+        return "\n".join(f"{key}: {value}" for key, value in secrets_registry.items())
+
+    value_indices = {}
+    key_lines = []
+    for key, value in secrets_registry.items():
+        index = value_indices.setdefault(f"{value}", len(value_indices))
+        key_lines.append(f"{key}: {index}")
+    value_lines = [f"{index}: {value}" for value, index in value_indices.items()]
+    header = f"{_DEDUP_VALUES_HEADER} {len(value_indices)}"
+    return "\n".join([header] + value_lines + key_lines)
+
+
+def encrypt_secrets(secrets_registry, key_file, compression=None, dedup=False):
     """
     Encrypt the secrets registry and write it to the secrets_registry.log file.
 
     Args:
         secrets_registry (dict): Dictionary containing the secrets registry.
         key_file (str): Path to the encryption key file.
+        compression (str): Compress the registry with "zlib" or "lzma" before
+            encryption. (Default None)
+        dedup (bool): Store identical values once. (Default False)
     """
     # Load the encryption key
-    with open(key_file, "rb") as f:
-        encryption_key = f.read()
+    encryption_key = load_encryption_key(key_file)
 
     # Convert secrets registry to bytes
-    secrets_data = "\n".join(
-        f"{key}: {value}" for key, value in secrets_registry.items()
+    secrets_bytes = pack_payload(
+        serialize_registry(secrets_registry, dedup), compression
     )
-    secrets_bytes = secrets_data.encode()
 
     # Encrypt the secrets
     encrypted_data = encrypt_data(secrets_bytes, encryption_key)
@@ -0,0 +1,206 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, locking becomes a no-op
+    fcntl = None
+
+_LOCK_POLL_INTERVAL = 0.05
+
+
+class LockTimeoutError(TimeoutError):
+    """
+    Raised when a registry lock cannot be acquired within the timeout.
+    """
+
+
+class LockMetrics:
+    """
+    Thread-safe counters of how long registry lock acquisitions waited.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def record(self, mode, wait_time):
+        """
+        Record one lock acquisition.
+
+        Args:
+            mode (str): "shared" or "exclusive".
+            wait_time (float): Seconds spent waiting for the lock.
+        """
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                mode, {"count": 0, "total_wait": 0.0, "max_wait": 0.0}
+            )
+            metrics["count"] += 1
+            metrics["total_wait"] += wait_time
+            metrics["max_wait"] = max(metrics["max_wait"], wait_time)
+
+    def snapshot(self):
+        """
+        Get a copy of the recorded metrics.
+
+        Returns:
+            dict: Per mode count, total_wait and max_wait in seconds.
+        """
+        with self._lock:
+            return {mode: dict(metrics) for mode, metrics in self._metrics.items()}
+
+    def reset(self):
+        """
+        Clear the recorded metrics.
+        """
+        with self._lock:
+            self._metrics.clear()
+
+
+lock_wait_metrics = LockMetrics()
+
+
+def lock_filename(secrets_registry_file):
+    """
+    Get the path of the lock file guarding a secrets registry.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+
+    Returns:
+        str: Path to the lock file.
+    """
+    return f"{secrets_registry_file}.lock"
+
+
+def _open_lock_file(lock_file, shared, create):
+    """
+    Open the lock file, read-only for shared locks so readers need no write access.
+
+    Returns:
+        int or None: File descriptor, or None if a shared lock file is missing and
+        create is False.
+    """
+    if not shared:
+        return os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        return os.open(lock_file, os.O_RDONLY)
+    except FileNotFoundError:
+        if not create:
+            return None
+        return os.open(lock_file, os.O_RDONLY | os.O_CREAT, 0o644)
+
+
+@contextmanager
+def registry_lock(
+    secrets_registry_file, shared=False, timeout=30.0, logger=None, create=True
+):
+    """
+    Hold an advisory fcntl lock on the secrets registry.
+
+    Readers take a shared lock and do not block each other, writers take an
+    exclusive lock covering the encryption key and every registry file. Readers
+    open the lock file read-only, and read without a lock if it cannot be opened.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        shared (bool): Take a shared (reader) lock instead of an exclusive one. (Default False)
+        timeout (float): Seconds to wait for the lock, None waits forever. (Default 30.0)
+        logger (logging.Logger): Logger instance. (Default None)
+        create (bool): Create a missing lock file for a shared lock, otherwise read
+            without a lock. (Default True)
+
+    Raises:
+        LockTimeoutError: If the lock is not acquired within the timeout.
+    """
+    mode = "shared" if shared else "exclusive"
+    if fcntl is None:
+        yield
+        return
+
+    lock_file = lock_filename(secrets_registry_file)
+    try:
+        fd = _open_lock_file(lock_file, shared, create)
+    except OSError as e:
+        if not shared:
+            raise
+        (logger or logging.getLogger()).warning(
+            f"Reading secrets registry without a lock, cannot open {lock_file}: {e}"
+        )
+        fd = None
+    if fd is None:
+        yield
+        return
+
+    operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    start = time.monotonic()
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if timeout is not None and time.monotonic() - start >= timeout:
+                    raise LockTimeoutError(
+                        f"Timed out after {timeout}s waiting for {mode} lock on {lock_file}"
+                    )
+                time.sleep(_LOCK_POLL_INTERVAL)
+
+        wait_time = time.monotonic() - start
+        lock_wait_metrics.record(mode, wait_time)
+        if logger is not None:
+            logger.info(f"Acquired {mode} registry lock after {wait_time:.3f}s")
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class ReadWriteLock:
+    """
+    In-process lock allowing many concurrent readers or a single writer.
+
+    Waiting writers block new readers, so a refresh is not starved by a
+    steady stream of reads.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
@@ -0,0 +1,147 @@
+import fnmatch
+import re
+from collections.abc import Mapping
+
+import anyconfig
+from anyconfig.common.errors import UnknownFileTypeError
+from custom_secrets_manager.constants import (
+    _PLAUSIBLE_FILE_EXT,
+    _PLAUSIBLE_KEY_NAMES,
+    match_config_filename,
+    secrets_registry_filename,
+    secrets_registry_lock_entry,
+    secrets_registry_shard_entry,
+)
+
+_REGEX_PREFIX = "re:"
+
+# Files written by the tool itself, never loaded whatever the match rules say
+_TOOL_OUTPUT_FILES = [
+    match_config_filename,
+    secrets_registry_filename,
+    secrets_registry_shard_entry,
+    secrets_registry_lock_entry,
+    "encryption_key.txt",
+    "load_config_process*",
+]
+
+
+def _rule_to_regex(rule):
+    """
+    Translate a match rule to a regex matching a whole file name.
+
+    Args:
+        rule (str): Glob pattern, or a regular expression prefixed with "re:".
+
+    Returns:
+        str: Regular expression.
+    """
+    if rule.startswith(_REGEX_PREFIX):
+        return f"(?:{rule[len(_REGEX_PREFIX):]})\\Z"
+    return fnmatch.translate(rule)
+
+
+def validate_match_rule(rule):
+    """
+    Check that a match rule compiles in the form it is combined with other rules.
+
+    Args:
+        rule (str): Glob pattern, or a regular expression prefixed with "re:".
+
+    Raises:
+        ValueError: If the rule is not a valid regex, e.g. uses global inline flags
+            such as "(?i)" that are only allowed at the start of a whole pattern.
+    """
+    try:
+        re.compile(_rule_to_regex(rule))
+    except re.error as e:
+        raise ValueError(f"Invalid match rule regex '{rule}': {e}")
+
+
+def compile_match_pattern(include=None, exclude=None, scan_file_ext=None):
+    """
+    Compile file name match rules into a single regular expression.
+
+    Without include rules, file names must contain one of the plausible key
+    names and end with one of the scanned extensions. Include rules replace
+    that default and exclude rules always win. The match rules config file and
+    the registry, lock, key, log and profile files written by the tool are
+    never matched.
+
+    Args:
+        include (list): Glob patterns or "re:" regexes a file name must match.
+        exclude (list): Glob patterns or "re:" regexes a file name must not match.
+        scan_file_ext (list): File types where secrets are to be scanned. Only
+            applied to include rules when given explicitly.
+
+    Returns:
+        re.Pattern: Compiled pattern, to be used with match().
+
+    Raises:
+        ValueError: If a rule is not a valid regex.
+    """
+    for rule in (include or []) + (exclude or []):
+        validate_match_rule(rule)
+
+    extensions = scan_file_ext if scan_file_ext is not None else _PLAUSIBLE_FILE_EXT
+    extension_regex = "|".join(re.escape(extension) for extension in extensions)
+
+    if include:
+        include_regex = "|".join(_rule_to_regex(rule) for rule in include)
+        if scan_file_ext is not None:
+            include_regex = f"(?=.*(?:{extension_regex})\\Z)(?:{include_regex})"
+    else:
+        key_name_regex = "|".join(re.escape(name) for name in _PLAUSIBLE_KEY_NAMES)
+        include_regex = f"(?=.*(?i:{key_name_regex})).*(?:{extension_regex})\\Z"
+
+    exclude_rules = [fnmatch.translate(name) for name in _TOOL_OUTPUT_FILES]
+    exclude_rules.extend(_rule_to_regex(rule) for rule in exclude or [])
+    exclude_regex = "|".join(exclude_rules)
+
+    try:
+        return re.compile(f"(?!{exclude_regex})(?:{include_regex})", re.DOTALL)
+    except re.error as e:
+        raise ValueError(f"Invalid match rule regex: {e}")
+
+
+def load_match_rules(config_file):
+    """
+    Load include and exclude rules from a match rules config file.
+
+    The file holds an "include" and/or "exclude" entry, each a pattern or a
+    list of patterns, e.g. {"include": ["prod_secrets.yaml"], "exclude": ["*_docs.*"]}.
+
+    Args:
+        config_file (str): Path to the config file.
+
+    Returns:
+        tuple: Lists of include and exclude rules.
+
+    Raises:
+        FileNotFoundError: If the file cant be parsed by anyconfig.
+        ValueError: If the file does not hold a mapping of pattern strings.
+    """
+    try:
+        config = anyconfig.load(config_file)
+    except UnknownFileTypeError:
+        raise FileNotFoundError(f"No parser found for file: {config_file}")
+
+    if not isinstance(config, Mapping):
+        raise ValueError(
+            f"Invalid match config file: {config_file}. "
+            "Expected a mapping with 'include' and/or 'exclude' entries"
+        )
+
+    rules = []
+    for name in ("include", "exclude"):
+        value = config.get(name) or []
+        value = [value] if isinstance(value, str) else value
+        if not isinstance(value, list) or not all(
+            isinstance(rule, str) for rule in value
+        ):
+            raise ValueError(
+                f"Invalid match config file: {config_file}. "
+                f"'{name}' should be a pattern or a list of patterns"
+            )
+        rules.append(list(value))
+    return tuple(rules)
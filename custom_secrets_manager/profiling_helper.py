@@ -0,0 +1,94 @@
+import cProfile
+import os
+import tracemalloc
+
+from custom_secrets_manager.constants import profile_filename, memory_report_filename
+
+
+def format_allocation(stat):
+    """
+    Format a tracemalloc statistic without source text or frame locals.
+
+    Only the file name and line number of the allocating frame are reported, so
+    no value that passed through the starter process can end up in the report.
+
+    Args:
+        stat (tracemalloc.Statistic): Allocation statistic.
+
+    Returns:
+        str: Redacted report line.
+    """
+    frame = stat.traceback[0]
+    return (
+        f"{frame.filename}:{frame.lineno}: "
+        f"size={stat.size / 1024:.1f} KiB, count={stat.count}"
+    )
+
+
+def write_memory_report(snapshot, report_path, top_n):
+    """
+    Write the top allocation sites of a tracemalloc snapshot to a file.
+
+    Args:
+        snapshot (tracemalloc.Snapshot): Snapshot taken at the end of the run.
+        report_path (str): Path of the report file.
+        top_n (int): Number of allocation sites to report.
+    """
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+    stats = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in stats)
+    with open(report_path, "w") as f:
+        f.write(f"Top {top_n} allocation sites, {total / 1024:.1f} KiB total\n")
+        for index, stat in enumerate(stats[:top_n], 1):
+            f.write(f"#{index}: {format_allocation(stat)}\n")
+
+
+def run_profiled(
+    target, output_dir, logger, profile=False, trace_memory=False, top_n=25
+):
+    """
+    Run a callable under cProfile and/or tracemalloc.
+
+    The cProfile output only holds code locations and timings, and the memory
+    report only holds allocation sites, so neither captures secret values.
+
+    Args:
+        target (callable): Callable to run, taking no arguments.
+        output_dir (str): Directory where the profile and memory report are written.
+        logger (logging.Logger): Logger instance.
+        profile (bool): Capture a cProfile profile. (Default False)
+        trace_memory (bool): Capture a tracemalloc allocation report. (Default False)
+        top_n (int): Number of allocation sites to report. (Default 25)
+
+    Returns:
+        The return value of target.
+    """
+    profiler = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        return target()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if trace_memory:
+            # Snapshot before dumping the profile so its allocations are left out
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report_path = os.path.join(output_dir, memory_report_filename)
+            write_memory_report(snapshot, report_path, top_n)
+            logger.info(f"Memory allocation report written to {report_path}")
+        if profiler is not None:
+            profile_path = os.path.join(output_dir, profile_filename)
+            profiler.dump_stats(profile_path)
+            logger.info(f"Profile written to {profile_path}")
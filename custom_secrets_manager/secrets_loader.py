@@ -1,9 +1,21 @@
 import os
 import ast
+import copy
 import json
+import sys
+import threading
+import time
 import anyconfig
 from anyconfig.common.errors import UnknownFileTypeError
-from custom_secrets_manager.encryption_helper import decrypt_data
+from cryptography.fernet import InvalidToken
+from custom_secrets_manager.constants import _DEDUP_VALUES_HEADER
+from custom_secrets_manager.encryption_helper import decrypt_data, load_encryption_key
+from custom_secrets_manager.locking_helper import ReadWriteLock, registry_lock
+from custom_secrets_manager.sharding_helper import (
+    parse_manifest,
+    shard_filename,
+    shard_for_key,
+)
 
 
 def parse_content(content):
@@ -32,7 +44,8 @@ def parse_content(content):
     except json.JSONDecodeError:
         pass
 
-    # Return the content as is if it cannot be parsed as a dictionary
+    # Return the content as is if it cannot be parsed as a dictionary. Values are
+    # never interned, interned strings can outlive rotated secrets.
     return content
 
 
@@ -48,6 +61,8 @@ def _parse_nested_dict(dictionary):
     """
     parsed_dict = {}
     for key, value in dictionary.items():
+        if isinstance(key, str):
+            key = sys.intern(key)
         if isinstance(value, str):
             parsed_dict[key] = parse_content(value)
         elif isinstance(value, dict):
@@ -81,18 +96,30 @@ def load_secrets(file_path):
     return secrets
 
 
-def use_secrets(decryption_key, disable_encryption=False):
+def use_secrets(
+    decryption_key,
+    disable_encryption=False,
+    keys=None,
+    lock_timeout=30.0,
+    key_file=None,
+):
     """
     Load and parse the secrets registry file.
 
     Args:
         decryption_key (str): Decryption key to decrypt the secrets registry file.
         disable_encryption (bool): Flag indicating whether encryption is disabled (default: False).
+        keys (list): Secret names to load. All secrets are loaded if None (default: None).
+            For a sharded registry, only the shards holding these keys are decrypted.
+        lock_timeout (float): Seconds to wait for the shared registry lock (default: 30.0).
+        key_file (str): Path to the encryption key file, read under the registry lock
+            when decryption_key is None (default: None).
 
     Returns:
         dict: Secrets registry containing parsed secrets.
 
     Raises:
+        LockTimeoutError: If a writer holds the registry lock beyond lock_timeout.
         FileNotFoundError: If the secrets registry file is not found.
         PermissionError: If there is a permission error while reading the secrets registry file.
         ValueError: If the secrets registry file cannot be decrypted.
@@ -100,6 +127,88 @@ def use_secrets(decryption_key, disable_encryption=False):
     parent_dir = os.getcwd()
     secrets_registry_file = os.path.join(parent_dir, "secrets_registry.log")
 
+    with registry_lock(secrets_registry_file, shared=True, timeout=lock_timeout):
+        # Read the key under the same lock so a writer cannot replace it in between
+        if decryption_key is None and key_file is not None and not disable_encryption:
+            decryption_key = load_encryption_key(key_file)
+        raw_registry = load_raw_registry(
+            secrets_registry_file, decryption_key, disable_encryption, keys
+        )
+
+    # Parse each distinct value once. Keys sharing a value get their own copy of
+    # mutable structures, while strings and other immutable leaves are shared.
+    parsed_values = {}
+    secrets_registry = {}
+    for key, value in raw_registry.items():
+        if value in parsed_values:
+            secrets_registry[key] = copy.deepcopy(parsed_values[value])
+        else:
+            secrets_registry[key] = parsed_values[value] = parse_content(value)
+
+    return secrets_registry
+
+
+def load_raw_registry(
+    secrets_registry_file, decryption_key, disable_encryption=False, keys=None
+):
+    """
+    Load the unparsed values of a secrets registry, resolving shards if it is sharded.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        decryption_key (str): Decryption key to decrypt the secrets registry file.
+        disable_encryption (bool): Flag indicating whether encryption is disabled (default: False).
+        keys (list): Secret names to load. All secrets are loaded if None (default: None).
+
+    Returns:
+        dict: Mapping of secret names to their raw string values.
+    """
+    decrypted_data = read_secrets_registry(
+        secrets_registry_file, decryption_key, disable_encryption
+    )
+
+    shard_digests = parse_manifest(decrypted_data)
+    if shard_digests is None:
+        raw_registry = split_registry_lines(decrypted_data)
+    else:
+        shard_count = len(shard_digests)
+        if keys is None:
+            shard_indices = range(shard_count)
+        else:
+            shard_indices = sorted({shard_for_key(key, shard_count) for key in keys})
+        raw_registry = {}
+        for index in shard_indices:
+            shard_data = read_secrets_registry(
+                shard_filename(secrets_registry_file, index),
+                decryption_key,
+                disable_encryption,
+            )
+            raw_registry.update(split_registry_lines(shard_data))
+
+    if keys is not None:
+        raw_registry = {key: raw_registry[key] for key in keys if key in raw_registry}
+    return raw_registry
+
+
+def read_secrets_registry(
+    secrets_registry_file, decryption_key, disable_encryption=False
+):
+    """
+    Read and decrypt the secrets registry file without parsing its values.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        decryption_key (str): Decryption key to decrypt the secrets registry file.
+        disable_encryption (bool): Flag indicating whether encryption is disabled (default: False).
+
+    Returns:
+        str: Decrypted content of the secrets registry file.
+
+    Raises:
+        FileNotFoundError: If the secrets registry file is not found.
+        PermissionError: If there is a permission error while reading the secrets registry file.
+        ValueError: If the secrets registry file cannot be decrypted.
+    """
     try:
         with open(secrets_registry_file, "r") as f:
             if disable_encryption:
@@ -117,14 +226,268 @@ def use_secrets(decryption_key, disable_encryption=False):
                 secrets_registry_file
             )
         )
-    except ValueError:
+    except (ValueError, InvalidToken):
         raise ValueError(
             "Failed to decrypt secrets registry file with the provided decryption key"
         )
 
-    secrets_registry = {}
-    for line in decrypted_data.splitlines():
-        key, value = line.split(":", 1)  # Split on the first occurrence of ":"
-        secrets_registry[key.strip()] = parse_content(value.strip())
+    return decrypted_data
 
-    return secrets_registry
+
+def split_registry_lines(decrypted_data):
+    """
+    Split decrypted registry content into raw, unparsed values.
+
+    Registries written with a value table are resolved, so keys sharing a value
+    share one string object.
+
+    Args:
+        decrypted_data (str): Decrypted content of the secrets registry file.
+
+    Returns:
+        dict: Mapping of secret names to their raw string values.
+    """
+    lines = decrypted_data.splitlines()
+    values = None
+    if (
+        lines
+        and ": " not in lines[0]
+        and lines[0].startswith(f"{_DEDUP_VALUES_HEADER} ")
+    ):
+        value_count = int(lines[0][len(_DEDUP_VALUES_HEADER) :])
+        values = [line.split(":", 1)[1].strip() for line in lines[1 : value_count + 1]]
+        lines = lines[value_count + 1 :]
+
+    raw_registry = {}
+    for line in lines:
+        if values is None:
+            key, value = line.split(":", 1)  # Split on the first occurrence of ":"
+            value = value.strip()
+        else:
+            # Value table indices never contain ":", so keys may
+            key, index = line.rsplit(": ", 1)
+            value = values[int(index)]
+        raw_registry[sys.intern(key.strip())] = value
+    return raw_registry
+
+
+class SecretsStore:
+    """
+    Thread-safe, in-process view of the secrets registry.
+
+    Any number of threads can read while one thread refreshes. The registry is
+    loaded outside the lock and swapped in under a short write lock, so readers
+    only wait for the swap, never for the file read and decryption.
+
+    Args:
+        decryption_key (str): Decryption key to decrypt the secrets registry file.
+        disable_encryption (bool): Flag indicating whether encryption is disabled (default: False).
+        keys (list): Secret names to load. All secrets are loaded if None (default: None).
+        lock_timeout (float): Seconds to wait for the shared registry lock (default: 30.0).
+        key_file (str): Path to the encryption key file, read on every refresh when
+            decryption_key is None (default: None).
+    """
+
+    def __init__(
+        self,
+        decryption_key,
+        disable_encryption=False,
+        keys=None,
+        lock_timeout=30.0,
+        key_file=None,
+    ):
+        self._decryption_key = decryption_key
+        self._key_file = key_file
+        self._disable_encryption = disable_encryption
+        self._keys = keys
+        self._lock_timeout = lock_timeout
+        self._lock = ReadWriteLock()
+        self._secrets = {}
+
+    def refresh(self):
+        """
+        Reload the secrets registry from disk.
+        """
+        secrets = use_secrets(
+            self._decryption_key,
+            self._disable_encryption,
+            self._keys,
+            self._lock_timeout,
+            self._key_file,
+        )
+        with self._lock.write_lock():
+            self._secrets = secrets
+
+    def get(self, key, default=None):
+        """
+        Get a secret by name.
+
+        Args:
+            key (str): Secret name.
+            default: Value returned if the secret is not in the registry (default: None).
+
+        Returns:
+            The parsed secret value, or default.
+        """
+        with self._lock.read_lock():
+            return self._secrets.get(key, default)
+
+    def as_dict(self):
+        """
+        Get a shallow copy of all loaded secrets.
+
+        Returns:
+            dict: Secrets registry containing parsed secrets.
+        """
+        with self._lock.read_lock():
+            return dict(self._secrets)
+
+
+class _Preload:
+    """
+    State of a preload started by preload().
+    """
+
+    def __init__(
+        self, decryption_key, key_file, disable_encryption, keys, lock_timeout
+    ):
+        self._decryption_key = decryption_key
+        self._key_file = key_file
+        self._disable_encryption = disable_encryption
+        self._keys = keys
+        self._lock_timeout = lock_timeout
+        self.ready = threading.Event()
+        self.store = None
+        self.error = None
+        self.started_at = time.monotonic()
+        self.time_to_ready = None
+        self.thread = None
+        self._fallback_lock = threading.Lock()
+
+    def load(self):
+        try:
+            store = SecretsStore(
+                self._decryption_key,
+                self._disable_encryption,
+                self._keys,
+                self._lock_timeout,
+                self._key_file,
+            )
+            store.refresh()
+            self.store = store
+        except Exception as e:
+            self.error = e
+        finally:
+            self.time_to_ready = time.monotonic() - self.started_at
+            self.ready.set()
+
+    def start(self):
+        """
+        Start loading in a daemon thread.
+        """
+        self.thread = threading.Thread(
+            target=self.load, name="secrets-preload", daemon=True
+        )
+        self.thread.start()
+
+    def restart_after_fork(self):
+        """
+        Restart loading if the loading thread did not survive a fork.
+
+        Only one caller restarts it, the others find the new thread alive.
+        """
+        with self._fallback_lock:
+            if not self.ready.is_set() and not self.thread.is_alive():
+                self.start()
+
+
+_preload = None
+
+
+def preload(
+    decryption_key=None,
+    key_file=None,
+    disable_encryption=False,
+    keys=None,
+    lock_timeout=30.0,
+    background=True,
+):
+    """
+    Load the secrets registry ahead of the first get() call.
+
+    Meant to be called at import time or service boot, e.g. from a gunicorn
+    on_starting hook, so that reading the key file, decryption and parsing happen
+    off the critical path of the first request.
+
+    Args:
+        decryption_key (str): Decryption key. Read from key_file if None (default: None).
+        key_file (str): Path to the encryption key file (default: encryption_key.txt
+            in the current directory).
+        disable_encryption (bool): Flag indicating whether encryption is disabled (default: False).
+        keys (list): Secret names to load. All secrets are loaded if None (default: None).
+        lock_timeout (float): Seconds to wait for the shared registry lock (default: 30.0).
+        background (bool): Load in a daemon thread instead of blocking (default: True).
+    """
+    global _preload
+    if key_file is None:
+        key_file = os.path.join(os.getcwd(), "encryption_key.txt")
+    state = _Preload(decryption_key, key_file, disable_encryption, keys, lock_timeout)
+    if background:
+        state.start()
+    else:
+        state.load()
+    _preload = state
+
+
+def get(key, default=None, timeout=None):
+    """
+    Get a preloaded secret, blocking until preload() has finished.
+
+    Args:
+        key (str): Secret name.
+        default: Value returned if the secret is not in the registry (default: None).
+        timeout (float): Seconds to wait for the preload, None waits forever (default: None).
+
+    Returns:
+        The parsed secret value, or default.
+
+    Raises:
+        RuntimeError: If preload() has not been called, or if the preload failed
+            (chained to the original error).
+        TimeoutError: If the preload does not finish within timeout.
+    """
+    state = _preload
+    if state is None:
+        raise RuntimeError("Secrets have not been preloaded, call preload() first")
+    if (
+        not state.ready.is_set()
+        and state.thread is not None
+        and not state.thread.is_alive()
+    ):
+        # Forked while the preload was running, its thread does not exist here.
+        # Restart it in the background so timeout still applies.
+        state.restart_after_fork()
+    if not state.ready.wait(timeout):
+        raise TimeoutError(f"Secrets preload did not finish within {timeout}s")
+    if state.error is not None:
+        raise RuntimeError("Secrets preload failed") from state.error
+    return state.store.get(key, default)
+
+
+def preload_status():
+    """
+    Report the readiness of the preloaded secrets.
+
+    Returns:
+        dict: "started", "ready" and "error" flags, and "time_to_ready" in seconds
+        (None until ready).
+    """
+    state = _preload
+    if state is None:
+        return {"started": False, "ready": False, "time_to_ready": None, "error": None}
+    return {
+        "started": True,
+        "ready": state.ready.is_set(),
+        "time_to_ready": state.time_to_ready,
+        "error": None if state.error is None else str(state.error),
+    }
@@ -0,0 +1,217 @@
+import glob
+import hashlib
+import os
+
+from cryptography.fernet import InvalidToken
+from custom_secrets_manager.encryption_helper import (
+    decrypt_data,
+    encrypt_data,
+    load_encryption_key,
+    pack_payload,
+    serialize_registry,
+)
+
+# Registry lines always contain ": ", so this header cannot collide with a secret
+_MANIFEST_HEADER = "#shard-manifest"
+
+
+def shard_for_key(key, shard_count):
+    """
+    Get the shard index holding a key.
+
+    A stable hash is used so that a key always maps to the same shard across
+    processes and runs.
+
+    Args:
+        key (str): Secret name.
+        shard_count (int): Number of shards.
+
+    Returns:
+        int: Shard index.
+    """
+    digest = hashlib.sha256(str(key).encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def shard_filename(secrets_registry_file, index):
+    """
+    Get the path of a shard file, e.g. secrets_registry.shard-03.log.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        index (int): Shard index.
+
+    Returns:
+        str: Path to the shard file.
+    """
+    base, ext = os.path.splitext(secrets_registry_file)
+    return f"{base}.shard-{index:02d}{ext}"
+
+
+def split_into_shards(secrets_registry, shard_count):
+    """
+    Split a secrets registry into shards by key hash.
+
+    Args:
+        secrets_registry (dict): Dictionary containing the secrets registry.
+        shard_count (int): Number of shards.
+
+    Returns:
+        list: One registry dictionary per shard.
+    """
+    shards = [{} for _ in range(shard_count)]
+    for key, value in secrets_registry.items():
+        shards[shard_for_key(key, shard_count)][key] = value
+    return shards
+
+
+def build_manifest(shard_texts, compression=None):
+    """
+    Build the manifest listing the shard count and a digest of each shard.
+
+    Digests cover the compression format too, so changing it rewrites every shard.
+
+    Args:
+        shard_texts (list): Serialized content of each shard.
+        compression (str): Compression applied to the shards. (Default None)
+
+    Returns:
+        str: Manifest content.
+    """
+    lines = [f"{_MANIFEST_HEADER} {len(shard_texts)}"]
+    for index, text in enumerate(shard_texts):
+        # Hash plaintext plus format name instead of compressing every shard
+        digest = hashlib.sha256(f"{compression}\n{text}".encode()).hexdigest()
+        lines.append(f"shard-{index:02d}: {digest}")
+    return "\n".join(lines)
+
+
+def parse_manifest(content):
+    """
+    Parse a manifest into the list of shard digests.
+
+    Args:
+        content (str): Decrypted content of the secrets registry file.
+
+    Returns:
+        list or None: Shard digests, or None if the content is not a manifest.
+    """
+    lines = content.splitlines()
+    if not lines or ": " in lines[0] or not lines[0].startswith(f"{_MANIFEST_HEADER} "):
+        return None
+    try:
+        shard_count = int(lines[0][len(_MANIFEST_HEADER) :])
+    except ValueError:
+        return None
+    digests = [line.split(":", 1)[1].strip() for line in lines[1:] if ":" in line]
+    if len(digests) != shard_count or len(digests) != len(lines) - 1:
+        return None
+    return digests
+
+
+def load_shard_manifest(secrets_registry_file, key_file, disable_encryption=False):
+    """
+    Load the shard digests of an existing sharded registry.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        key_file (str): Path where encryption key is stored.
+        disable_encryption (bool): If the registry is stored without encryption.
+
+    Returns:
+        list or None: Shard digests, or None if there is no readable manifest.
+    """
+    try:
+        with open(secrets_registry_file, "r") as f:
+            content = f.read()
+        if not disable_encryption:
+            content = decrypt_data(content, load_encryption_key(key_file))
+    except (OSError, ValueError, InvalidToken):
+        return None
+    return parse_manifest(content)
+
+
+def _write_registry_text(file_path, text, encryption_key, compression=None):
+    if encryption_key is None:
+        with open(file_path, "w") as f:
+            f.write(text)
+    else:
+        with open(file_path, "wb") as f:
+            f.write(encrypt_data(pack_payload(text, compression), encryption_key))
+
+
+def remove_stale_shards(secrets_registry_file, shard_count, logger):
+    """
+    Remove shard files left over from a run with more shards.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        shard_count (int): Number of shards in use, 0 for an unsharded registry.
+        logger (logging.Logger): Logger instance.
+    """
+    base, ext = os.path.splitext(secrets_registry_file)
+    for file_path in glob.glob(f"{glob.escape(base)}.shard-*{ext}"):
+        index = file_path[len(base) + len(".shard-") : -len(ext) or None]
+        if not index.isdigit() or int(index) >= shard_count:
+            os.remove(file_path)
+            logger.info(f"Removed stale shard '{os.path.basename(file_path)}'")
+
+
+def write_sharded_registry(
+    secrets_registry_file,
+    secrets_registry,
+    shard_count,
+    logger,
+    key_file=None,
+    disable_encryption=False,
+    compression=None,
+    dedup=False,
+):
+    """
+    Write the secrets registry as shard files plus a manifest.
+
+    Only shards whose content changed since the previous manifest are
+    rewritten. The manifest is written to the secrets registry file itself.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        secrets_registry (dict): Dictionary containing the secrets registry.
+        shard_count (int): Number of shards.
+        logger (logging.Logger): Logger instance.
+        key_file (str): Path where encryption key is stored. (Default None)
+        disable_encryption (bool): If encryption is to be used. (Default False)
+        compression (str): Compress shards with "zlib" or "lzma" before
+            encryption. (Default None)
+        dedup (bool): Store identical values once per shard. (Default False)
+    """
+    encryption_key = None if disable_encryption else load_encryption_key(key_file)
+    previous_digests = load_shard_manifest(
+        secrets_registry_file, key_file, disable_encryption
+    )
+    if previous_digests is not None and len(previous_digests) != shard_count:
+        previous_digests = None
+
+    shard_texts = [
+        serialize_registry(shard, dedup)
+        for shard in split_into_shards(secrets_registry, shard_count)
+    ]
+    manifest = build_manifest(shard_texts, compression)
+    digests = parse_manifest(manifest)
+
+    rewritten = 0
+    for index, text in enumerate(shard_texts):
+        file_path = shard_filename(secrets_registry_file, index)
+        if (
+            previous_digests is not None
+            and previous_digests[index] == digests[index]
+            and os.path.isfile(file_path)
+        ):
+            continue
+        _write_registry_text(file_path, text, encryption_key, compression)
+        rewritten += 1
+
+    _write_registry_text(secrets_registry_file, manifest, encryption_key)
+    remove_stale_shards(secrets_registry_file, shard_count, logger)
+    logger.info(
+        f"Secrets registry written as {shard_count} shards, {rewritten} rewritten"
+    )
@@ -1,60 +1,107 @@
 import os
+import re
+import sys
 
-from custom_secrets_manager.secrets_loader import load_secrets
+from custom_secrets_manager.secrets_loader import (
+    load_secrets,
+    load_raw_registry,
+)
 from custom_secrets_manager.encryption_helper import (
     save_encryption_key,
     encrypt_secrets,
+    serialize_registry,
 )
 from custom_secrets_manager.workflow_helper import setup_starter, sanitise_secrets_logs
-from custom_secrets_manager.constants import _PLAUSIBLE_FILE_EXT, _PLAUSIBLE_KEY_NAMES
+from custom_secrets_manager.locking_helper import registry_lock
+from custom_secrets_manager.sharding_helper import (
+    load_shard_manifest,
+    remove_stale_shards,
+    write_sharded_registry,
+)
+from custom_secrets_manager.profiling_helper import run_profiled
+from custom_secrets_manager.matching_helper import (
+    compile_match_pattern,
+    load_match_rules,
+)
+from custom_secrets_manager.constants import logger_filename, match_config_filename
 
 
 def get_os_environ(key):
     return os.environ.get(key)
 
 
-def scan_secrets_files(parent_dir, scan_file_ext=None):
+def scan_secrets_files(parent_dir, scan_file_ext=None, match_pattern=None):
     """
     Scan the parent directory for secrets files.
 
     Args:
         parent_dir (str): Path to the parent directory.
         scan_file_ext (list): File types where secrets are to be scanned
+        match_pattern (re.Pattern): Compiled file name match rules. Defaults to
+            the plausible key names with scan_file_ext.
 
     Returns:
         list: List of secrets file paths.
     """
-    if scan_file_ext is None:
-        scan_file_ext = _PLAUSIBLE_FILE_EXT
-    secrets_files = []
-    for f in os.listdir(parent_dir):
-        if any(keyword in f.lower() for keyword in _PLAUSIBLE_KEY_NAMES) and any(
-            f.endswith(extension) for extension in scan_file_ext
-        ):
-            secrets_files.append(f)
-    return secrets_files
+    if match_pattern is None:
+        match_pattern = compile_match_pattern(scan_file_ext=scan_file_ext)
+    return [f for f in os.listdir(parent_dir) if match_pattern.match(f)]
 
 
-def update_secrets_registry(
-    parent_dir,
-    secrets_registry_file,
-    secrets_files,
-    logger,
-    secrets_registry,
-    key_file=None,
-    disable_encryption=False,
-):
+def build_match_pattern(args, current_dir, scan_file_ext=None, key_file=None):
     """
-    Update the secrets registry with secrets from files.
+    Compile the file name match rules from the command line and config file.
+
+    Rules from the config file, given with --match-config or found as
+    .csm_match.json in the scanned directory, come before command line rules.
+    The config file and the key file are excluded when they are in the
+    scanned directory.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        current_dir (str): Directory where secrets files are scanned.
+        scan_file_ext (list): File types where secrets are to be scanned
+        key_file (str): Path where encryption key is stored. (Default None)
+
+    Returns:
+        re.Pattern: Compiled file name match rules.
+
+    Raises:
+        ValueError: If a match rule is not a valid regex.
+    """
+    include, exclude = [], []
+    match_config = args.match_config
+    if match_config is None:
+        default_match_config = os.path.join(current_dir, match_config_filename)
+        if os.path.isfile(default_match_config):
+            match_config = default_match_config
+    if match_config is not None:
+        include, exclude = load_match_rules(match_config)
+
+    # Never load the rules file or the key file as a secrets file
+    for own_file in (match_config, key_file):
+        if own_file is not None and os.path.dirname(
+            os.path.realpath(own_file)
+        ) == os.path.realpath(current_dir):
+            exclude.append("re:" + re.escape(os.path.basename(own_file)))
+
+    include += args.include or []
+    exclude += args.exclude or []
+    return compile_match_pattern(include, exclude, scan_file_ext)
+
+
+def collect_secrets(parent_dir, secrets_files, logger, secrets_registry):
+    """
+    Load secrets from files into the registry, resolving empty values from the environment.
 
     Args:
         parent_dir (str): Path to the parent directory.
-        secrets_registry_file (str): Path to the secrets registry file.
         secrets_files (list): List of secrets file paths.
         logger (logging.Logger): Logger instance.
         secrets_registry (dict): Dictionary to store the secrets registry.
-        key_file (str): Path where encryption key is stored. (Default None)
-        disable_encryption (bool): If encryption is to be used. (Default False)
+
+    Returns:
+        dict: The updated secrets registry.
     """
     for secrets_file in secrets_files:
         file_path = os.path.join(parent_dir, secrets_file)
@@ -71,9 +118,145 @@ def update_secrets_registry(
             else:
                 secrets_registry[key] = value
                 logger.info(f"Added secret '{key}' from '{secrets_file}'")
+    return secrets_registry
+
+
+def load_current_registry(secrets_registry_file, key_file, disable_encryption, logger):
+    """
+    Load the raw values of the existing secrets registry, if there is one.
+
+    Args:
+        secrets_registry_file (str): Path to the secrets registry file.
+        key_file (str): Path where encryption key is stored.
+        disable_encryption (bool): If the registry is stored without encryption.
+        logger (logging.Logger): Logger instance.
 
+    Returns:
+        dict: Mapping of secret names to raw string values. Empty if the registry
+        or its key is missing or cannot be decrypted.
+    """
+    decryption_key = None
     if not disable_encryption:
-        encrypted_secrets = encrypt_secrets(secrets_registry, key_file)
+        try:
+            with open(key_file, "rb") as f:
+                decryption_key = f.read()
+        except FileNotFoundError:
+            logger.warning(
+                f"Encryption key '{key_file}' not found, treating registry as empty"
+            )
+            return {}
+
+    try:
+        raw_registry = load_raw_registry(
+            secrets_registry_file, decryption_key, disable_encryption
+        )
+    except FileNotFoundError:
+        logger.info("No existing secrets registry found, treating registry as empty")
+        return {}
+    except ValueError:
+        logger.warning(
+            "Existing secrets registry could not be decrypted, treating it as empty"
+        )
+        return {}
+
+    return raw_registry
+
+
+def diff_secrets_registry(current_registry, new_registry):
+    """
+    Compare two secrets registries by key name.
+
+    Values are compared in their serialized form, as they would be written to
+    the registry file.
+
+    Args:
+        current_registry (dict): Existing registry, as raw string values.
+        new_registry (dict): Registry built from the current secrets files.
+
+    Returns:
+        tuple: Sorted lists of added, removed and changed key names.
+    """
+    added = sorted(key for key in new_registry if key not in current_registry)
+    removed = sorted(key for key in current_registry if key not in new_registry)
+    changed = sorted(
+        key
+        for key in new_registry
+        if key in current_registry
+        and f"{new_registry[key]}".strip() != current_registry[key]
+    )
+    return added, removed, changed
+
+
+def report_registry_diff(added, removed, changed, logger):
+    """
+    Print the key names that would change in the registry. Values are never printed.
+
+    Args:
+        added (list): Key names that would be added.
+        removed (list): Key names that would be removed.
+        changed (list): Key names whose values would change.
+        logger (logging.Logger): Logger instance.
+    """
+    for key in added:
+        print(f"+ {key}")
+    for key in removed:
+        print(f"- {key}")
+    for key in changed:
+        print(f"~ {key}")
+    summary = f"{len(added)} added, {len(removed)} removed, {len(changed)} changed"
+    print(summary)
+    logger.info(f"Dry run: {summary}")
+
+
+def update_secrets_registry(
+    parent_dir,
+    secrets_registry_file,
+    secrets_files,
+    logger,
+    secrets_registry,
+    key_file=None,
+    disable_encryption=False,
+    shard_count=1,
+    compression=None,
+    dedup=False,
+):
+    """
+    Update the secrets registry with secrets from files.
+
+    Args:
+        parent_dir (str): Path to the parent directory.
+        secrets_registry_file (str): Path to the secrets registry file.
+        secrets_files (list): List of secrets file paths.
+        logger (logging.Logger): Logger instance.
+        secrets_registry (dict): Dictionary to store the secrets registry.
+        key_file (str): Path where encryption key is stored. (Default None)
+        disable_encryption (bool): If encryption is to be used. (Default False)
+        shard_count (int): Number of encrypted shard files to split the registry into,
+            1 keeps a single registry file. (Default 1)
+        compression (str): Compress the registry with "zlib" or "lzma" before
+            encryption. (Default None)
+        dedup (bool): Store identical values once in a shared value table. (Default False)
+    """
+    collect_secrets(parent_dir, secrets_files, logger, secrets_registry)
+
+    if shard_count > 1:
+        write_sharded_registry(
+            os.path.join(parent_dir, secrets_registry_file),
+            secrets_registry,
+            shard_count,
+            logger,
+            key_file,
+            disable_encryption,
+            compression,
+            dedup,
+        )
+        return
+
+    remove_stale_shards(os.path.join(parent_dir, secrets_registry_file), 0, logger)
+    if not disable_encryption:
+        encrypted_secrets = encrypt_secrets(
+            secrets_registry, key_file, compression, dedup
+        )
         # Write the encrypted secrets to the secrets_registry.log file
         with open(os.path.join(parent_dir, secrets_registry_file), "wb") as f:
             f.write(encrypted_secrets)
@@ -84,51 +267,120 @@ def update_secrets_registry(
             "Please delete the secrets_registry.log after reading to avoid a security lapse."
         )
         with open(os.path.join(parent_dir, secrets_registry_file), "w") as f:
-            for key, value in secrets_registry.items():
-                f.write(f"{key}: {value}\n")
+            if secrets_registry:
+                f.write(f"{serialize_registry(secrets_registry, dedup)}\n")
 
 
-def main():
+def run_starter(args, logger, current_dir, secrets_registry_file):
     """
-    Main entry point of the starter process.
+    Run the starter process with parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        logger (logging.Logger): Logger instance.
+        current_dir (str): Directory where secrets files are scanned.
+        secrets_registry_file (str): Path to the secrets registry file.
+
+    Returns:
+        int: Exit code in dry run mode, otherwise None.
     """
-    # Load arguments, set up logger and log files
-    args, logger, current_dir, secrets_registry_file = setup_starter()
     key_file = args.key_file
     disable_encryption = args.disable_encryption
     target_file_type = args.file_type
 
-    # Save encryption key
-    if not disable_encryption:
-        if key_file == "encryption_key.txt":
-            key_file = os.path.join(current_dir, key_file)
-
-        save_encryption_key(key_file, logger)
-    else:
-        logger.warning("Encryption disabled!")
+    if not disable_encryption and key_file == "encryption_key.txt":
+        key_file = os.path.join(current_dir, key_file)
 
     # Scan parent directory for secrets files
     if isinstance(target_file_type, str):
         target_file_type = [target_file_type]
-    secrets_files = scan_secrets_files(current_dir, scan_file_ext=target_file_type)
-
-    # Initialize secrets registry
-    secrets_registry = {}
-
-    # Update secrets registry
-    update_secrets_registry(
-        current_dir,
-        secrets_registry_file,
-        secrets_files,
-        logger,
-        secrets_registry,
-        key_file,
-        disable_encryption,
+    match_pattern = build_match_pattern(
+        args, current_dir, target_file_type, None if disable_encryption else key_file
+    )
+    secrets_files = scan_secrets_files(
+        current_dir, scan_file_ext=target_file_type, match_pattern=match_pattern
     )
 
+    if args.list_files:
+        # Print what would be loaded without parsing anything
+        for secrets_file in secrets_files:
+            print(secrets_file)
+        return 0
+
+    if args.dry_run or args.diff:
+        # Compare against the current registry without touching key or registry
+        new_registry = collect_secrets(current_dir, secrets_files, logger, {})
+        # Dry runs leave the scanned directory untouched, so no lock file is created
+        with registry_lock(
+            secrets_registry_file,
+            shared=True,
+            timeout=args.lock_timeout,
+            logger=logger,
+            create=False,
+        ):
+            current_registry = load_current_registry(
+                secrets_registry_file, key_file, disable_encryption, logger
+            )
+        added, removed, changed = diff_secrets_registry(current_registry, new_registry)
+        report_registry_diff(added, removed, changed, logger)
+        if args.diff and (added or removed or changed):
+            return 1
+        return 0
+
+    # Parse every secrets file first, so a bad file aborts before the key changes
+    secrets_registry = collect_secrets(current_dir, secrets_files, logger, {})
+
+    # Hold the writer lock so the key and the registry encrypted with it change together
+    with registry_lock(secrets_registry_file, timeout=args.lock_timeout, logger=logger):
+        # Save encryption key, a sharded registry keeps its key for unchanged shards
+        if not disable_encryption:
+            if args.shards > 1 and load_shard_manifest(secrets_registry_file, key_file):
+                logger.info("Reusing existing encryption key for sharded registry")
+            else:
+                save_encryption_key(key_file, logger)
+        else:
+            logger.warning("Encryption disabled!")
+            if args.compression != "none":
+                logger.warning("Compression only applies to encrypted registries")
+
+        # Update secrets registry, its secrets are already collected
+        update_secrets_registry(
+            current_dir,
+            secrets_registry_file,
+            [],
+            logger,
+            secrets_registry,
+            key_file,
+            disable_encryption,
+            args.shards,
+            args.compression,
+            args.dedup,
+        )
+
     # Clean up files from git tracking
     sanitise_secrets_logs(current_dir, logger)
 
 
+def main():
+    """
+    Main entry point of the starter process.
+    """
+    # Load arguments, set up logger and log files
+    args, logger, current_dir, secrets_registry_file = setup_starter()
+
+    if args.profile or args.trace_memory:
+        output_dir = os.path.dirname(os.path.abspath(logger_filename))
+        return run_profiled(
+            lambda: run_starter(args, logger, current_dir, secrets_registry_file),
+            output_dir,
+            logger,
+            profile=args.profile,
+            trace_memory=args.trace_memory,
+            top_n=args.profile_top,
+        )
+
+    return run_starter(args, logger, current_dir, secrets_registry_file)
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
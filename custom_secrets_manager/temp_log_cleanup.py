@@ -1,5 +1,12 @@
 import os
 
+from custom_secrets_manager.constants import (
+    profile_filename,
+    memory_report_filename,
+    secrets_registry_shard_entry,
+    secrets_registry_lock_entry,
+)
+
 
 def check_git_repository(dir_path):
     """
@@ -49,6 +56,12 @@ def update_gitignore(dir_path, logger):
     secrets_registry_entry = "secrets_registry.log"
     load_config_entry = "load_config_process.log"
     encryption_key_entry = "encryption_key.txt"
+    extra_entries = [
+        secrets_registry_shard_entry,
+        secrets_registry_lock_entry,
+        profile_filename,
+        memory_report_filename,
+    ]
 
     with open(gitignore_path, "a+") as f:
         f.seek(0)
@@ -59,6 +72,9 @@ def update_gitignore(dir_path, logger):
             f.write(f"{load_config_entry}\n")
         if encryption_key_entry not in content:
             f.write(f"{encryption_key_entry}\n")
+        for extra_entry in extra_entries:
+            if extra_entry not in content:
+                f.write(f"{extra_entry}\n")
     logger.info(".gitignore file updated")
 
 
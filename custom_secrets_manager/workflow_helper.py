@@ -4,6 +4,8 @@ from logging.handlers import RotatingFileHandler
 import os
 
 from custom_secrets_manager.temp_log_cleanup import run_git_cleanup
+from custom_secrets_manager.encryption_helper import COMPRESSION_CHOICES
+from custom_secrets_manager.matching_helper import validate_match_rule
 from custom_secrets_manager.constants import logger_filename, secrets_registry_filename
 
 
@@ -44,12 +46,98 @@ def parse_arguments():
         required=False,
         help="Directory where secrets files are to be scanned",
     )
+    parser.add_argument(
+        "--include",
+        action="append",
+        help="Glob pattern, or regex prefixed with 're:', of secrets file names to "
+        "load instead of the default secrets/keys names. Can be repeated",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        help="Glob pattern, or regex prefixed with 're:', of file names to skip. "
+        "Can be repeated",
+    )
+    parser.add_argument(
+        "--match-config",
+        default=None,
+        help="Config file with 'include' and 'exclude' match rules "
+        "(default: .csm_match.json in the scanned directory, if present)",
+    )
+    parser.add_argument(
+        "--list-files",
+        action="store_true",
+        help="Print the secrets files that would be loaded without parsing them",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report registry changes without generating a key or writing the registry",
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Like --dry-run, but exit with status 1 when the registry would change",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under cProfile and write a .prof file next to the log file",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Run under tracemalloc and write an allocation report next to the log file",
+    )
+    parser.add_argument(
+        "--profile-top",
+        default=25,
+        type=int,
+        help="Number of allocation sites in the memory report (default: 25)",
+    )
+    parser.add_argument(
+        "--shards",
+        default=1,
+        type=int,
+        help="Split the secrets registry into this many encrypted shard files (default: 1)",
+    )
+    parser.add_argument(
+        "--compression",
+        default="none",
+        choices=COMPRESSION_CHOICES,
+        help="Compress the secrets registry before encryption (default: none)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Store identical secret values once in the secrets registry",
+    )
+    parser.add_argument(
+        "--lock-timeout",
+        default=30.0,
+        type=float,
+        help="Seconds to wait for the secrets registry lock (default: 30)",
+    )
 
     args = parser.parse_args()
 
     if args.file_type and not args.file_type.startswith("."):
         raise ValueError("Invalid file type. File type should start with a dot (.)")
 
+    if args.match_config and not os.path.isfile(args.match_config):
+        raise ValueError("Invalid match config file path.")
+
+    for rule in (args.include or []) + (args.exclude or []):
+        validate_match_rule(rule)
+
+    if args.profile_top < 1:
+        raise ValueError(
+            "Invalid profile top count. Profile top count should be at least 1"
+        )
+
+    if args.shards < 1:
+        raise ValueError("Invalid shard count. Shard count should be at least 1")
+
     if args.dir and not os.path.isdir(args.dir):
         raise ValueError("Invalid directory path.")
 
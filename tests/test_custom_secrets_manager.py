@@ -1,6 +1,19 @@
+import threading
+import time
 import pytest
 from unittest.mock import patch
-from custom_secrets_manager.secrets_loader import load_secrets
+from custom_secrets_manager import secrets_loader
+from custom_secrets_manager.secrets_loader import (
+    SecretsStore,
+    load_secrets,
+    use_secrets,
+)
+from custom_secrets_manager.encryption_helper import encrypt_secrets, generate_key
+from custom_secrets_manager.locking_helper import (
+    LockTimeoutError,
+    lock_wait_metrics,
+    registry_lock,
+)
 from anyconfig.common.errors import UnknownFileTypeError
 
 
@@ -88,3 +101,166 @@ def test_load_secrets_from_ini(mock_load, ini_content):
 def test_load_secrets_from_unknown_file_type():
     with pytest.raises(FileNotFoundError):
         load_secrets("secrets.txt")
+
+
+def test_registry_lock_shared_readers_and_writer_timeout(tmp_path):
+    secrets_registry_file = str(tmp_path / "secrets_registry.log")
+    lock_wait_metrics.reset()
+
+    with registry_lock(secrets_registry_file, shared=True):
+        # A second reader is not blocked by the first one
+        with registry_lock(secrets_registry_file, shared=True, timeout=0.1):
+            pass
+        # A writer is
+        with pytest.raises(LockTimeoutError):
+            with registry_lock(secrets_registry_file, timeout=0.1):
+                pass
+
+    assert lock_wait_metrics.snapshot()["shared"]["count"] == 2
+
+
+def test_use_secrets_waits_for_writer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "secrets_registry.log").write_text("api_key: my_api_key\n")
+
+    with registry_lock(str(tmp_path / "secrets_registry.log")):
+        with pytest.raises(LockTimeoutError):
+            use_secrets(None, disable_encryption=True, lock_timeout=0.1)
+
+    assert use_secrets(None, disable_encryption=True) == {"api_key": "my_api_key"}
+
+
+def test_secrets_store_concurrent_readers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry_file = tmp_path / "secrets_registry.log"
+    registry_file.write_text("api_key: first\n")
+    store = SecretsStore(None, disable_encryption=True)
+    store.refresh()
+
+    results = []
+
+    def read():
+        for _ in range(100):
+            results.append(store.get("api_key"))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    registry_file.write_text("api_key: second\n")
+    store.refresh()
+    for reader in readers:
+        reader.join()
+
+    assert set(results) <= {"first", "second"}
+    assert store.get("api_key") == "second"
+    assert store.as_dict() == {"api_key": "second"}
+
+
+def test_preload_and_get(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    key_file = tmp_path / "encryption_key.txt"
+    key_file.write_bytes(generate_key())
+    (tmp_path / "secrets_registry.log").write_bytes(
+        encrypt_secrets({"api_key": "my_api_key"}, str(key_file))
+    )
+
+    secrets_loader.preload()
+
+    assert secrets_loader.get("api_key", timeout=5) == "my_api_key"
+    assert secrets_loader.get("missing", "default") == "default"
+    status = secrets_loader.preload_status()
+    assert status["ready"] is True
+    assert status["error"] is None
+    assert status["time_to_ready"] >= 0
+
+
+def test_preload_error_is_raised_by_get(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    secrets_loader.preload(disable_encryption=True, background=False)
+
+    with pytest.raises(RuntimeError) as first:
+        secrets_loader.get("api_key")
+    with pytest.raises(RuntimeError) as second:
+        secrets_loader.get("api_key")
+    assert isinstance(first.value.__cause__, FileNotFoundError)
+    assert first.value is not second.value
+    assert secrets_loader.preload_status()["error"] is not None
+
+
+def test_get_after_fork_loads_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "secrets_registry.log").write_text("api_key: my_api_key\n")
+    # A preload whose thread did not survive a fork
+    dead_thread = threading.Thread(target=lambda: None)
+    dead_thread.start()
+    dead_thread.join()
+    state = secrets_loader._Preload(None, None, True, None, 30.0)
+    state.thread = dead_thread
+    monkeypatch.setattr(secrets_loader, "_preload", state)
+
+    with patch.object(
+        secrets_loader.SecretsStore,
+        "refresh",
+        autospec=True,
+        side_effect=secrets_loader.SecretsStore.refresh,
+    ) as mock_refresh:
+        results = []
+        readers = [
+            threading.Thread(
+                target=lambda: results.append(secrets_loader.get("api_key"))
+            )
+            for _ in range(8)
+        ]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+
+    assert results == ["my_api_key"] * 8
+    assert mock_refresh.call_count == 1
+
+
+def test_use_secrets_reads_key_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    key_file = tmp_path / "encryption_key.txt"
+    key_file.write_bytes(generate_key())
+    (tmp_path / "secrets_registry.log").write_bytes(
+        encrypt_secrets({"api_key": "my_api_key"}, str(key_file))
+    )
+
+    assert use_secrets(None, key_file=str(key_file)) == {"api_key": "my_api_key"}
+
+
+def test_use_secrets_without_lock_file_access(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "secrets_registry.log").write_text("api_key: my_api_key\n")
+
+    with patch(
+        "custom_secrets_manager.locking_helper.os.open",
+        side_effect=PermissionError("read-only"),
+    ):
+        assert use_secrets(None, disable_encryption=True) == {"api_key": "my_api_key"}
+
+    assert not (tmp_path / "secrets_registry.log.lock").exists()
+
+
+def test_get_after_fork_honours_timeout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dead_thread = threading.Thread(target=lambda: None)
+    dead_thread.start()
+    dead_thread.join()
+    state = secrets_loader._Preload(None, None, True, None, 30.0)
+    state.thread = dead_thread
+    monkeypatch.setattr(secrets_loader, "_preload", state)
+    release = threading.Event()
+
+    with patch.object(
+        secrets_loader.SecretsStore, "refresh", side_effect=lambda: release.wait(5)
+    ):
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            secrets_loader.get("api_key", timeout=0.1)
+        assert time.monotonic() - start < 2
+        release.set()
+        state.thread.join()
@@ -1,7 +1,19 @@
 import os
+import json
+import sys
 import pytest
 import logging
 from custom_secrets_manager.starter_process import update_secrets_registry
+from custom_secrets_manager.encryption_helper import (
+    save_encryption_key,
+    serialize_registry,
+)
+from custom_secrets_manager.secrets_loader import split_registry_lines, use_secrets
+from custom_secrets_manager.sharding_helper import (
+    parse_manifest,
+    shard_filename,
+    shard_for_key,
+)
 
 
 @pytest.fixture(scope="module")
@@ -75,3 +87,164 @@ def test_integration_update_secrets_registry(test_environment):
         },
     }
     assert secrets_registry == expected_registry
+
+
+def test_integration_sharded_registry(tmp_path):
+    logger = logging.getLogger()
+    key_file = str(tmp_path / "encryption_key.txt")
+    save_encryption_key(key_file, logger)
+    secrets_json = tmp_path / "secrets.json"
+    secrets = {f"key_{index}": f"value_{index}" for index in range(20)}
+    secrets_json.write_text(json.dumps(secrets))
+
+    update_secrets_registry(
+        str(tmp_path),
+        "secrets_registry.log",
+        ["secrets.json"],
+        logger,
+        {},
+        key_file,
+        shard_count=4,
+    )
+    shard_files = [
+        shard_filename(str(tmp_path / "secrets_registry.log"), i) for i in range(4)
+    ]
+    assert all(os.path.isfile(shard_file) for shard_file in shard_files)
+
+    # Only the shard holding the changed key is rewritten
+    for shard_file in shard_files:
+        os.utime(shard_file, (0, 0))
+    secrets["key_3"] = "changed"
+    secrets_json.write_text(json.dumps(secrets))
+    update_secrets_registry(
+        str(tmp_path),
+        "secrets_registry.log",
+        ["secrets.json"],
+        logger,
+        {},
+        key_file,
+        shard_count=4,
+    )
+    changed_shard = shard_for_key("key_3", 4)
+    for index, shard_file in enumerate(shard_files):
+        assert (os.path.getmtime(shard_file) != 0) == (index == changed_shard)
+
+    # Only the shard holding the requested key is needed to read it
+    for index, shard_file in enumerate(shard_files):
+        if index != changed_shard:
+            os.remove(shard_file)
+    with open(key_file, "rb") as f:
+        decryption_key = f.read()
+    os.chdir(tmp_path)
+    assert use_secrets(decryption_key, keys=["key_3"]) == {"key_3": "changed"}
+
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_integration_compressed_registry(tmp_path, compression):
+    logger = logging.getLogger()
+    key_file = str(tmp_path / "encryption_key.txt")
+    save_encryption_key(key_file, logger)
+    secrets = {"certificate": "-----BEGIN CERTIFICATE-----" + "A" * 4096}
+    (tmp_path / "secrets.json").write_text(json.dumps(secrets))
+
+    update_secrets_registry(
+        str(tmp_path),
+        "secrets_registry.log",
+        ["secrets.json"],
+        logger,
+        {},
+        key_file,
+        compression=compression,
+    )
+    assert os.path.getsize(tmp_path / "secrets_registry.log") < 1024
+
+    with open(key_file, "rb") as f:
+        decryption_key = f.read()
+    os.chdir(tmp_path)
+    assert use_secrets(decryption_key) == secrets
+
+
+def test_integration_dedup_registry(tmp_path):
+    logger = logging.getLogger()
+    database = {"host": "db.internal", "port": 5432, "password": "shared_password"}
+    secrets = {"service_a": database, "service_b": database, "token": "abc"}
+    (tmp_path / "secrets.json").write_text(json.dumps(secrets))
+
+    update_secrets_registry(
+        str(tmp_path),
+        "secrets_registry.log",
+        ["secrets.json"],
+        logger,
+        {},
+        disable_encryption=True,
+        dedup=True,
+    )
+    registry_text = (tmp_path / "secrets_registry.log").read_text()
+    assert registry_text.count("shared_password") == 1
+
+    os.chdir(tmp_path)
+    loaded = use_secrets(None, disable_encryption=True)
+    assert loaded["service_a"] == loaded["service_b"]
+    assert loaded["service_a"] is not loaded["service_b"]
+    assert loaded["service_a"]["host"] is loaded["service_b"]["host"]
+    assert loaded["token"] == "abc"
+
+
+def test_plain_registry_is_not_a_manifest():
+    for registry in ({"__shards__": "1", "k": "v"}, {"#shard-manifest 1": "v"}):
+        assert parse_manifest(serialize_registry(registry)) is None
+    for content in ("#shard-manifest abc", "#shard-manifest 1\nno digest"):
+        assert parse_manifest(content) is None
+
+
+def test_sharded_registry_compression_change_rewrites_shards(tmp_path):
+    logger = logging.getLogger()
+    key_file = str(tmp_path / "encryption_key.txt")
+    save_encryption_key(key_file, logger)
+    secrets = {f"key_{index}": f"value_{index}" for index in range(20)}
+    (tmp_path / "secrets.json").write_text(json.dumps(secrets))
+    shard_files = [
+        shard_filename(str(tmp_path / "secrets_registry.log"), i) for i in range(4)
+    ]
+
+    # First write, unchanged rerun, then a compression format change
+    for compression, expect_rewrite in ((None, True), (None, False), ("zlib", True)):
+        for shard_file in shard_files:
+            if os.path.isfile(shard_file):
+                os.utime(shard_file, (0, 0))
+        update_secrets_registry(
+            str(tmp_path),
+            "secrets_registry.log",
+            ["secrets.json"],
+            logger,
+            {},
+            key_file,
+            shard_count=4,
+            compression=compression,
+        )
+        rewritten = [os.path.getmtime(f) != 0 for f in shard_files]
+        assert rewritten == [expect_rewrite] * 4
+
+
+def test_plain_registry_is_not_a_value_table():
+    for registry in ({"__values__": "abc", "k": "v"}, {"#value-table 1": "v"}):
+        assert split_registry_lines(serialize_registry(registry)) == registry
+
+
+def test_value_table_keys_with_colons():
+    registry = {"db:password": "shared", "cache:password": "shared", "a: b": "x"}
+
+    assert split_registry_lines(serialize_registry(registry, dedup=True)) == registry
+
+
+def test_loaded_secret_values_are_not_interned(tmp_path):
+    os.chdir(tmp_path)
+    (tmp_path / "secrets_registry.log").write_text(
+        "password: rotated_secret\ndatabase: {'password': 'nested_secret'}\n"
+    )
+
+    loaded = use_secrets(None, disable_encryption=True)
+
+    for value in (loaded["password"], loaded["database"]["password"]):
+        # Interning an equal copy returns the loaded object only if it was interned
+        assert sys.intern("".join(list(value))) is not value
@@ -1,12 +1,16 @@
 import os
+import subprocess
+import sys
 import logging
 import pytest
 from unittest.mock import patch, Mock
 from custom_secrets_manager import starter_process
 
 from custom_secrets_manager.starter_process import (
+    load_current_registry,
     update_secrets_registry,
 )
+from custom_secrets_manager.matching_helper import compile_match_pattern
 
 
 @pytest.fixture
@@ -21,6 +25,14 @@ def mock_open(mocker):
     return mocker.mock_open()
 
 
+@pytest.fixture
+def work_dir(tmp_path):
+    # Run from a fresh directory, the starter writes its log file to the cwd
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
 def test_update_secrets_registry(mock_open, mock_load_secrets):
     parent_dir = os.path.dirname(os.path.abspath(__file__))
     secrets_registry_file = "secrets_registry.log"
@@ -84,6 +96,7 @@ def test_update_secrets_registry(mock_open, mock_load_secrets):
 
 
 # @pytest.mark.parametrize("mock_git_repository", argvalues=[True, False])
+@patch("custom_secrets_manager.starter_process.collect_secrets", return_value={})
 @patch("custom_secrets_manager.starter_process.scan_secrets_files")
 @patch("custom_secrets_manager.starter_process.update_secrets_registry")
 @patch(
@@ -99,6 +112,7 @@ def test_main(
     mock_update_secrets_registry,
     mock_scan_secrets_files,
     mock_git_repository,
+    mock_collect_secrets,
 ):
     # Treat it as a git repository
     mock_git_repository.side_effect = [True]
@@ -115,3 +129,202 @@ def test_main(
     # Add assertions to verify the expected behavior
     mock_scan_secrets_files.call_count == 2
     # mock_load_secrets.assert_called_once()
+
+
+def test_diff_secrets_registry():
+    current_registry = {"kept": "same", "changed": "old", "removed": "gone"}
+    new_registry = {"kept": "same", "changed": "new", "added": {"port": 5432}}
+
+    added, removed, changed = starter_process.diff_secrets_registry(
+        current_registry, new_registry
+    )
+
+    assert added == ["added"]
+    assert removed == ["removed"]
+    assert changed == ["changed"]
+
+
+def test_main_diff_does_not_write(work_dir, capsys):
+    (work_dir / "secrets.json").write_text('{"api_key": "my_api_key"}')
+    argv = ["custom_secrets_manager", "-dir", str(work_dir), "--diff"]
+
+    with patch("sys.argv", argv), patch(
+        "custom_secrets_manager.starter_process.save_encryption_key"
+    ) as mock_save_key, patch(
+        "custom_secrets_manager.starter_process.encrypt_secrets"
+    ) as mock_encrypt:
+        exit_code = starter_process.main()
+
+    assert exit_code == 1
+    mock_save_key.assert_not_called()
+    mock_encrypt.assert_not_called()
+    assert not (work_dir / "secrets_registry.log").exists()
+    assert not (work_dir / "secrets_registry.log.lock").exists()
+
+    output = capsys.readouterr().out
+    assert "+ api_key" in output
+    assert "my_api_key" not in output
+
+
+def test_main_profile_and_trace_memory(work_dir):
+    (work_dir / "secrets.json").write_text('{"api_key": "my_api_key"}')
+    argv = [
+        "custom_secrets_manager",
+        "-dir",
+        str(work_dir),
+        "--dry-run",
+        "--profile",
+        "--trace-memory",
+    ]
+
+    with patch("sys.argv", argv):
+        exit_code = starter_process.main()
+
+    assert exit_code == 0
+    assert (work_dir / "load_config_process.prof").exists()
+    memory_report = (work_dir / "load_config_process_memory.log").read_text()
+    assert memory_report.startswith("Top 25 allocation sites")
+    assert "my_api_key" not in memory_report
+
+
+def test_scan_secrets_files_match_rules(tmp_path):
+    for name in [
+        "secrets.yaml",
+        "API_KEYS.json",
+        "api_keys_docs.json",
+        "prod_config.ini",
+        "secrets.txt",
+        ".csm_match.json",
+    ]:
+        (tmp_path / name).write_text("")
+
+    default_files = starter_process.scan_secrets_files(str(tmp_path))
+    assert sorted(default_files) == [
+        "API_KEYS.json",
+        "api_keys_docs.json",
+        "secrets.yaml",
+    ]
+
+    match_pattern = compile_match_pattern(
+        include=["*.json", "re:prod_.*\\.ini"], exclude=["*_docs.*"]
+    )
+    matched_files = starter_process.scan_secrets_files(
+        str(tmp_path), match_pattern=match_pattern
+    )
+    assert sorted(matched_files) == ["API_KEYS.json", "prod_config.ini"]
+
+
+def test_main_list_files_does_not_parse(work_dir, capsys):
+    (work_dir / "secrets.json").write_text('{"api_key": "my_api_key"}')
+    (work_dir / "api_keys_docs.json").write_text("{}")
+    (work_dir / ".csm_match.json").write_text('{"exclude": ["*_docs.*"]}')
+    argv = ["custom_secrets_manager", "-dir", str(work_dir), "--list-files"]
+
+    with patch("sys.argv", argv), patch(
+        "custom_secrets_manager.starter_process.load_secrets"
+    ) as mock_load_secrets:
+        exit_code = starter_process.main()
+
+    assert exit_code == 0
+    mock_load_secrets.assert_not_called()
+    assert capsys.readouterr().out.splitlines() == ["secrets.json"]
+
+
+def test_module_diff_exit_status(tmp_path):
+    (tmp_path / "secrets.json").write_text('{"api_key": "my_api_key"}')
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=package_root)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "custom_secrets_manager.starter_process", "--diff"],
+        cwd=str(tmp_path),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    assert "+ api_key" in result.stdout
+
+
+def test_main_list_files_excludes_match_config(work_dir, capsys):
+    (work_dir / "secrets.json").write_text("{}")
+    (work_dir / "keys_rules.json").write_text('{"exclude": ["*_docs.*"]}')
+    argv = [
+        "custom_secrets_manager",
+        "-dir",
+        str(work_dir),
+        "--match-config",
+        str(work_dir / "keys_rules.json"),
+        "--list-files",
+    ]
+
+    with patch("sys.argv", argv):
+        starter_process.main()
+
+    assert capsys.readouterr().out.splitlines() == ["secrets.json"]
+
+
+def test_main_include_rule_skips_tool_output_files(work_dir, capsys):
+    (work_dir / "secrets.json").write_text('{"api_key": "my_api_key"}')
+    argv = ["custom_secrets_manager", "-dir", str(work_dir), "--include", "secrets*"]
+
+    # The second run must not pick up the registry, lock or log files of the first
+    for _ in range(2):
+        with patch("sys.argv", argv):
+            starter_process.main()
+
+    registry = load_current_registry(
+        str(work_dir / "secrets_registry.log"),
+        str(work_dir / "encryption_key.txt"),
+        False,
+        logging.getLogger(),
+    )
+    assert registry == {"api_key": "my_api_key"}
+
+    capsys.readouterr()
+    with patch("sys.argv", argv + ["--list-files"]):
+        starter_process.main()
+    assert capsys.readouterr().out.splitlines() == ["secrets.json"]
+
+
+def test_main_parse_error_keeps_encryption_key(work_dir):
+    (work_dir / "secrets.json").write_text('{"api_key": "my_api_key"}')
+    argv = ["custom_secrets_manager", "-dir", str(work_dir)]
+    with patch("sys.argv", argv):
+        starter_process.main()
+    key = (work_dir / "encryption_key.txt").read_bytes()
+
+    (work_dir / "keys.json").write_text("{not json")
+    with patch("sys.argv", argv), pytest.raises(Exception):
+        starter_process.main()
+
+    assert (work_dir / "encryption_key.txt").read_bytes() == key
+
+
+def test_match_config_invalid_regex_raises_value_error(work_dir):
+    (work_dir / ".csm_match.json").write_text('{"include": ["re:(?i)secrets.*"]}')
+    argv = ["custom_secrets_manager", "-dir", str(work_dir), "--list-files"]
+
+    with patch("sys.argv", argv), pytest.raises(ValueError, match="Invalid match rule"):
+        starter_process.main()
+
+
+@pytest.mark.parametrize(
+    "config", ['["*.json"]', '"*.json"', '{"include": [1]}', '{"exclude": {"a": "b"}}']
+)
+def test_match_config_invalid_structure_raises_value_error(work_dir, config):
+    (work_dir / "secrets.json").write_text("{}")
+    (work_dir / ".csm_match.json").write_text(config)
+    argv = ["custom_secrets_manager", "-dir", str(work_dir), "--list-files"]
+
+    with patch("sys.argv", argv), pytest.raises(ValueError):
+        starter_process.main()
+
+
+@pytest.mark.parametrize("profile_top", ["0", "-3"])
+def test_profile_top_must_be_positive(work_dir, profile_top):
+    argv = ["custom_secrets_manager", "--trace-memory", "--profile-top", profile_top]
+
+    with patch("sys.argv", argv), pytest.raises(ValueError, match="profile top"):
+        starter_process.main()